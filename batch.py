@@ -0,0 +1,151 @@
+# ============================================================
+# batch.py — mode headless/batch untuk stage media-prep
+# (potong audio, konversi video, gabung hasil) tanpa dialog Tk
+#
+#   py -3.11 batch.py jobs/                      # folder berisi pasangan audio/video
+#   py -3.11 batch.py --pair a.wav v.mp4 --pair b.mp3 w.mov --jobs 2
+# ============================================================
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main as pipeline
+from manifest import Manifest
+import metrics
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+AUDIO_EXTS = (".wav", ".mp3", ".flac", ".m4a", ".aac", ".ogg")
+
+
+def _pick(files, exts):
+    return [f for f in files if f.lower().endswith(exts)]
+
+
+def find_jobs(directory):
+    """Cari pasangan (nama, audio, video) di `directory`.
+
+    Dua bentuk didukung: subfolder berisi tepat satu audio + satu video,
+    atau file sejajar dengan nama dasar sama (podcast1.wav + podcast1.mp4).
+    """
+    jobs = []
+    entries = sorted(os.listdir(directory))
+    for name in entries:
+        sub = os.path.join(directory, name)
+        if os.path.isdir(sub):
+            files = [os.path.join(sub, f) for f in sorted(os.listdir(sub))]
+            audios, videos = _pick(files, AUDIO_EXTS), _pick(files, VIDEO_EXTS)
+            if len(audios) == 1 and len(videos) == 1:
+                jobs.append((name, audios[0], videos[0]))
+            else:
+                print(f"⚠️ Lewati {sub}: butuh tepat 1 audio + 1 video.")
+
+    files = [os.path.join(directory, f) for f in entries
+             if os.path.isfile(os.path.join(directory, f))]
+    videos = {os.path.splitext(os.path.basename(v))[0]: v for v in _pick(files, VIDEO_EXTS)}
+    for audio in _pick(files, AUDIO_EXTS):
+        stem = os.path.splitext(os.path.basename(audio))[0]
+        if stem in videos:
+            jobs.append((stem, audio, videos[stem]))
+        else:
+            print(f"⚠️ Lewati {audio}: tidak ada video {stem}.*")
+    return jobs
+
+
+def _unique_names(jobs):
+    seen = {}
+    result = []
+    for name, audio, video in jobs:
+        seen[name] = seen.get(name, 0) + 1
+        result.append((name if seen[name] == 1 else f"{name}_{seen[name]}", audio, video))
+    return result
+
+
+def run_job(name, audio, video, args, root):
+    """Jalankan satu job di folder sendiri: <root>/<name>/{input,output}."""
+    job_dir = os.path.join(root, name)
+    in_dir = os.path.join(job_dir, "input")
+    out_dir = os.path.join(job_dir, "output")
+    os.makedirs(in_dir, exist_ok=True)
+    os.makedirs(out_dir, exist_ok=True)
+
+    status = {"job": name, "audio": os.path.abspath(audio), "video": os.path.abspath(video),
+              "status": "failed", "segments": 0, "video_ok": False, "merge": "skipped",
+              "error": None}
+    started = time.perf_counter()
+    print(f"▶️ Job {name} dimulai ({os.path.basename(audio)} + {os.path.basename(video)})")
+    try:
+        manifest = Manifest(os.path.join(out_dir, "manifest.json"), job_dir)
+        segments, video_ok = pipeline.run_media_prep(manifest, audio, video, args, out_dir, in_dir)
+        status["segments"], status["video_ok"] = segments, video_ok
+        if segments and video_ok:
+            # hasil lipsync (result_seg_*.mp4) hanya ada jika job dijalankan ulang setelah generate
+            if any(f.startswith("result_seg_") for f in os.listdir(out_dir)):
+                from generate_sync_final import merge_videos
+                final = merge_videos(out_dir, args.stall_timeout)
+                status["merge"] = final or "failed"
+            status["status"] = "ok" if status["merge"] != "failed" else "failed"
+        else:
+            status["error"] = "audio gagal dipotong" if not segments else "video gagal dikonversi"
+    except Exception as e:
+        status["error"] = str(e)
+        print(f"❌ Job {name} error: {e}")
+    status["elapsed_s"] = round(time.perf_counter() - started, 2)
+
+    with open(os.path.join(job_dir, "status.json"), "w", encoding="utf-8") as f:
+        json.dump(status, f, indent=2)
+    print(f"{'✅' if status['status'] == 'ok' else '❌'} Job {name}: {status['status']} "
+          f"({status['segments']} potongan, {status['elapsed_s']}s)")
+    return status
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mode batch media-prep tanpa GUI",
+        parents=[pipeline.build_parser(add_help=False)])
+    parser.add_argument("directory", nargs="?",
+                        help="folder berisi pasangan audio/video")
+    parser.add_argument("--pair", nargs=2, action="append", default=[], metavar=("AUDIO", "VIDEO"),
+                        help="pasangan audio + video eksplisit (boleh diulang)")
+    parser.add_argument("--jobs", type=int, default=2,
+                        help="jumlah job yang diproses bersamaan (default: 2)")
+    parser.add_argument("--out", default=os.path.join(pipeline.BASE, "batch"),
+                        help="folder hasil; tiap job punya subfolder sendiri")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = [(os.path.splitext(os.path.basename(a))[0], a, v) for a, v in args.pair]
+    if args.directory:
+        jobs += find_jobs(args.directory)
+    jobs = _unique_names(jobs)
+    if not jobs:
+        print("❌ Tidak ada job. Berikan folder atau --pair AUDIO VIDEO.")
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    metrics.configure(args.metrics or os.path.join(args.out, "metrics.jsonl"))
+    print(f"=== START batch: {len(jobs)} job, {args.jobs} bersamaan ===")
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = list(pool.map(lambda job: run_job(*job, args, args.out), jobs))
+
+    summary = os.path.join(args.out, "batch_summary.json")
+    with open(summary, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    ok = sum(1 for r in results if r["status"] == "ok")
+    print(f"\n📋 Ringkasan batch: {ok}/{len(results)} job berhasil")
+    for r in results:
+        print(f"  {'✅' if r['status'] == 'ok' else '❌'} {r['job']}: {r['segments']} potongan, "
+              f"video {'ok' if r['video_ok'] else 'gagal'}, merge {r['merge']}, {r['elapsed_s']}s")
+    table = metrics.summary_table()
+    if table:
+        print("\n⏱️ Timing per stage (semua job):\n" + table)
+    print(f"📝 Status per job: {summary}")
+    return 0 if ok == len(results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
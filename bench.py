@@ -0,0 +1,350 @@
+# ============================================================
+# bench.py — benchmark slice_audio / convert_video / merge_videos
+#
+#   py -3.11 bench.py                              # semua ukuran (5m, 1h, 3h)
+#   py -3.11 bench.py --sizes 5m --out hasil.json
+#   py -3.11 bench.py --baseline bench_baseline.json
+#   py -3.11 bench.py --stages startup              # hanya cek waktu import
+#
+# Input sintetis dibuat lokal dengan ffmpeg (disimpan di --data dan
+# dipakai ulang). Setiap stage dijalankan di proses terpisah supaya
+# peak RSS per stage terukur.
+# ============================================================
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+SIZES = {"5m": 5 * 60, "1h": 60 * 60, "3h": 3 * 60 * 60}
+# nada 440 Hz: bicara 6 dtk / jeda 1.3 dtk, plus jeda panjang tiap 41 dtk
+TONE_PATTERN = "0.5*sin(2*PI*440*t)*lt(mod(t,7.3),6)*lt(mod(t,41),38)"
+MERGE_CLIPS = 8
+REGRESSION_PCT = 10.0
+# Waktu import (cumulative -X importtime) yang diizinkan per modul entry point
+STARTUP_TARGET_MS = 100.0
+STARTUP_MODULES = ("main", "batch", "generate_sync_final")
+# Dependensi berat yang hanya boleh dimuat saat stage-nya berjalan
+HEAVY_MODULES = ("numpy", "rich", "tkinter", "playwright", "pydub", "moviepy")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-y", "-v", "error"] + list(args), check=True)
+
+
+def make_inputs(data_dir, sizes):
+    """Buat audio nada/jeda + video uji (skip jika sudah ada)."""
+    os.makedirs(data_dir, exist_ok=True)
+    files = {}
+    for size in sizes:
+        path = os.path.join(data_dir, f"tone_{size}.wav")
+        if not os.path.exists(path):
+            print(f"🎛️ Membuat audio uji {size}...")
+            _ffmpeg("-f", "lavfi", "-i", f"aevalsrc='{TONE_PATTERN}':s=44100:d={SIZES[size]}",
+                    "-c:a", "pcm_s16le", path)
+        files[f"audio_{size}"] = path
+    video = os.path.join(data_dir, "clip_1080p.mp4")
+    if not os.path.exists(video):
+        print("🎛️ Membuat video uji...")
+        _ffmpeg("-f", "lavfi", "-i", "testsrc=size=1920x1080:rate=25",
+                "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000",
+                "-t", "30", "-c:v", "libx264", "-preset", "ultrafast",
+                "-c:a", "aac", "-shortest", video)
+    files["video"] = video
+    return files
+
+
+def _peak_rss_mb(who):
+    if resource is None:
+        return None
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux: KiB, macOS: byte
+    return round(rss / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+# ------------------------------------------------------------
+# Stage (dijalankan di proses anak)
+# ------------------------------------------------------------
+
+def _stage_scan(audio, work, cut_mode):
+    import main
+    source = main.AudioSource(audio)
+    index = main.build_silence_index(source, main.MIN_SILENCE_LEN, main.SILENCE_THRESH)
+    if cut_mode == "greedy":
+        cuts = main.plan_cuts_greedy(index, main.CHUNK_TARGET_MS, main.SILENCE_SEARCH_BACK_MS)
+    else:
+        cuts = main.plan_cuts_optimal(index, main.CHUNK_TARGET_MS)
+    return {"cuts": cuts, "forced": main.count_forced_cuts(index, cuts),
+            "bytes_read": os.path.getsize(audio)}
+
+
+def _stage_slice(audio, work, cut_mode):
+    import main
+    segments = main.slice_audio(audio, cut_mode=cut_mode, out_dir=work)
+    if not segments:
+        raise RuntimeError("slice_audio gagal")
+    return {"segments": len(segments)}
+
+
+def _stage_convert(video, work, _):
+    import main
+    main.CACHE = os.path.join(work, "cache")  # jangan pakai/isi cache konversi asli
+    main.CONVERT_STATS = os.path.join(work, "convert_stats.json")
+    os.makedirs(main.CACHE, exist_ok=True)
+    if not main.convert_video(video, in_dir=work):
+        raise RuntimeError("convert_video gagal")
+    return {"bytes_written": os.path.getsize(os.path.join(work, "video_safe.mp4"))}
+
+
+def _stage_merge(video, work, _):
+    import generate_sync_final
+    for i in range(1, MERGE_CLIPS + 1):
+        shutil.copyfile(video, os.path.join(work, f"result_seg_{i:02d}.mp4"))
+    final = generate_sync_final.merge_videos(work)
+    if not final:
+        raise RuntimeError("merge_videos gagal")
+    return {"bytes_written": os.path.getsize(final)}
+
+
+STAGES = {"scan": _stage_scan, "slice": _stage_slice,
+          "convert": _stage_convert, "merge": _stage_merge}
+
+
+def _child(stage, path, cut_mode, result_path):
+    work = tempfile.mkdtemp(prefix=f"bench_{stage}_")
+    started, cpu0 = time.perf_counter(), os.times()
+    try:
+        extra = STAGES[stage](path, work, cut_mode)
+        wall = time.perf_counter() - started
+        cpu1 = os.times()
+        result = {
+            "wall_s": round(wall, 3),
+            # CPU proses ini + proses anak (ffmpeg)
+            "cpu_s": round((cpu1.user - cpu0.user) + (cpu1.system - cpu0.system)
+                           + (cpu1.children_user - cpu0.children_user)
+                           + (cpu1.children_system - cpu0.children_system), 3),
+            "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+            "children_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        }
+        result.update(extra)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def run_stage(stage, path, cut_mode="optimal"):
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", stage, path, cut_mode, result_path],
+            cwd=BASE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"stage {stage} gagal: {proc.stderr.strip()[-500:]}")
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+# ------------------------------------------------------------
+# Waktu startup (python -X importtime)
+# ------------------------------------------------------------
+
+def measure_startup(module, runs=5):
+    """Waktu import `module` (ms, minimum dari beberapa run) + modul berat yang ikut dimuat."""
+    best, imported = None, set()
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=BASE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} gagal: {proc.stderr.strip()[-500:]}")
+        for line in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            name = name.strip()
+            imported.add(name.split(".")[0])
+            if name == module and cumulative.strip().isdigit():
+                ms = int(cumulative) / 1000.0
+                best = ms if best is None else min(best, ms)
+    if best is None:
+        raise RuntimeError(f"waktu import {module} tidak terbaca")
+    return {"wall_s": round(best / 1000.0, 4), "import_ms": round(best, 1),
+            "heavy": sorted(imported.intersection(HEAVY_MODULES))}
+
+
+def check_startup(results, target_ms):
+    """Ukur semua entry point; kembalikan jumlah yang melewati target / memuat modul berat."""
+    failures = 0
+    for module in STARTUP_MODULES:
+        res = measure_startup(module)
+        results["stages"][f"startup_{module}"] = res
+        ok = res["import_ms"] <= target_ms and not res["heavy"]
+        failures += not ok
+        line = f"{'✅' if ok else '❌'} import {module}: {res['import_ms']:.1f} ms (target {target_ms:.0f} ms)"
+        if res["heavy"]:
+            line += f", memuat {', '.join(res['heavy'])} saat import"
+        print(line)
+    return failures
+
+
+# ------------------------------------------------------------
+# Referensi & pembanding
+# ------------------------------------------------------------
+
+def reference_cuts(audio):
+    """Titik potong algoritma lama (pydub detect_silence per jendela 59 dtk).
+
+    Hanya dipakai untuk input pendek; None jika pydub tidak terpasang.
+    """
+    try:
+        from pydub import AudioSegment, silence
+    except ImportError:
+        return None
+    audio = AudioSegment.from_wav(audio)
+    cuts, pos = [], 0
+    while pos < len(audio):
+        target_end = min(pos + 59000, len(audio))
+        segment = audio[pos:target_end]
+        silences = silence.detect_silence(segment, min_silence_len=500, silence_thresh=-45)
+        cut = target_end
+        if silences and silences[-1][1] >= len(segment) - 8000:
+            cut = pos + silences[-1][1]
+        if target_end == len(audio):
+            cut = len(audio)
+        if cut <= pos:
+            if target_end == len(audio):
+                break
+            cut = target_end
+        cuts.append(cut)
+        pos = cut
+    return cuts
+
+
+def compare(results, baseline, threshold):
+    """Cetak selisih terhadap baseline; kembalikan jumlah regresi."""
+    regressions = 0
+    print(f"\n📊 Dibanding baseline (regresi jika > {threshold:.0f}% lebih lambat):")
+    for name, cur in results["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            print(f"  {name:<18} (tidak ada di baseline)")
+            continue
+        delta = (cur["wall_s"] - old["wall_s"]) / old["wall_s"] * 100 if old["wall_s"] else 0.0
+        flag = "❌" if delta > threshold else "✅"
+        regressions += delta > threshold
+        line = f"  {flag} {name:<18} {old['wall_s']:>8.2f}s -> {cur['wall_s']:>8.2f}s ({delta:+.1f}%)"
+        if "cuts" in cur and "cuts" in old and cur["cuts"] != old["cuts"]:
+            line += "  ⚠️ titik potong berbeda"
+            regressions += 1
+        print(line)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark stage pipeline")
+    parser.add_argument("--sizes", default="5m,1h,3h",
+                        help="ukuran audio uji, dipisah koma (5m,1h,3h)")
+    parser.add_argument("--stages", default="startup,scan,slice,convert,merge",
+                        help="stage yang diukur")
+    parser.add_argument("--data", default=os.path.join(BASE, "bench_data"),
+                        help="folder input sintetis (dipakai ulang)")
+    parser.add_argument("--out", default=os.path.join(BASE, "bench_results.json"))
+    parser.add_argument("--baseline", help="file hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_PCT,
+                        help="batas regresi waktu dalam persen")
+    parser.add_argument("--startup-target", type=float, default=STARTUP_TARGET_MS,
+                        help="batas waktu import entry point dalam ms")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [s for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    files = make_inputs(args.data, sizes) if set(stages) - {"startup"} else {}
+
+    results = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count(), "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+               "stages": {}}
+    failures = 0
+    if "startup" in stages:
+        failures += check_startup(results, args.startup_target)
+
+    plan = []
+    for size in sizes:
+        for stage in ("scan", "slice"):
+            if stage in stages:
+                plan += [(f"{stage}_{size}_{mode}", stage, files[f"audio_{size}"], mode)
+                         for mode in ("greedy", "optimal")]
+    for stage in ("convert", "merge"):
+        if stage in stages:
+            plan.append((stage, stage, files["video"], "optimal"))
+
+    for name, stage, path, mode in plan:
+        print(f"⏱️ {name}...")
+        try:
+            res = run_stage(stage, path, mode)
+        except Exception as e:
+            print(f"❌ {e}")
+            failures += 1
+            continue
+        results["stages"][name] = res
+        print(f"   {res['wall_s']:.2f}s wall, {res['cpu_s']:.2f}s cpu, "
+              f"peak RSS {res['peak_rss_mb']} MB (anak {res['children_peak_rss_mb']} MB)")
+
+    # Perencana optimal tidak boleh lebih buruk dari greedy (segmen maupun potong paksa)
+    for size in sizes:
+        g = results["stages"].get(f"scan_{size}_greedy")
+        o = results["stages"].get(f"scan_{size}_optimal")
+        if not g or not o:
+            continue
+        if len(o["cuts"]) > len(g["cuts"]) or o["forced"] > g["forced"]:
+            print(f"❌ {size}: optimal {len(o['cuts'])} segmen/{o['forced']} paksa, "
+                  f"greedy {len(g['cuts'])} segmen/{g['forced']} paksa")
+            failures += 1
+        else:
+            print(f"✅ {size}: optimal {len(o['cuts'])} segmen/{o['forced']} paksa, "
+                  f"greedy {len(g['cuts'])} segmen/{g['forced']} paksa")
+
+    # Titik potong greedy harus sama dengan algoritma lama
+    if "5m" in sizes and "scan_5m_greedy" in results["stages"]:
+        ref = reference_cuts(files["audio_5m"])
+        got = results["stages"]["scan_5m_greedy"]["cuts"]
+        if ref is None:
+            print("ℹ️ pydub tidak terpasang, cek referensi titik potong dilewati.")
+        elif ref == got:
+            print("✅ Titik potong greedy sama dengan referensi pydub.")
+        else:
+            print(f"❌ Titik potong berbeda dari referensi:\n   ref={ref}\n   got={got}")
+            failures += 1
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📝 Hasil: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures += compare(results, json.load(f), args.threshold)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 6 and sys.argv[1] == "--child":
+        _child(*sys.argv[2:])
+    else:
+        raise SystemExit(main())
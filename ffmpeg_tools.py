@@ -0,0 +1,207 @@
+# ============================================================
+# ffmpeg_tools.py — helper ffprobe/ffmpeg bersama untuk main.py
+# dan generate_sync_final.py
+# ============================================================
+
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROBE_ENTRIES = (
+    "stream=codec_type,codec_name,profile,width,height,pix_fmt,"
+    "r_frame_rate,time_base,sample_rate,channels:format=duration"
+)
+
+
+def probe(path):
+    """Jalankan ffprobe dan kembalikan dict {"video", "audio", "duration"}.
+
+    "video"/"audio" berisi stream pertama dari jenis tersebut (atau None).
+    """
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", PROBE_ENTRIES, "-of", "json", path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    data = json.loads(out)
+    info = {"video": None, "audio": None, "duration": None}
+    for stream in data.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind in ("video", "audio") and info[kind] is None:
+            info[kind] = stream
+    try:
+        info["duration"] = float(data.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        pass
+    return info
+
+
+def probe_many(paths, workers=8):
+    """ffprobe beberapa file sekaligus (paralel, urutan hasil = urutan input)."""
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return list(pool.map(probe, paths))
+
+
+def parse_rate(rate):
+    """'30000/1001' -> 29.97; None jika tidak valid."""
+    try:
+        num, _, den = str(rate).partition("/")
+        value = float(num) / float(den or 1)
+        return value if value > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+class Cancelled(Exception):
+    """Proses dihentikan karena stage lain gagal (fail fast)."""
+
+
+def run_cancellable(cmd, cancel=None, poll=0.2, **kwargs):
+    """subprocess.run(check=True) yang bisa dibatalkan lewat threading.Event.
+
+    stderr ditampung di file sementara (bukan pipe, agar tidak macet saat
+    polling) dan ikut disertakan di pesan error. Mengembalikan returncode.
+    """
+    with tempfile.TemporaryFile() as err:
+        kwargs.setdefault("stdout", subprocess.DEVNULL)
+        proc = subprocess.Popen(cmd, stderr=err, **kwargs)
+        try:
+            while True:
+                try:
+                    rc = proc.wait(timeout=poll)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel is not None and cancel.is_set():
+                        raise Cancelled(f"{os.path.basename(cmd[0])} dibatalkan")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        if rc != 0:
+            err.seek(0)
+            tail = err.read().decode(errors="replace").strip()[-500:]
+            raise subprocess.CalledProcessError(rc, cmd, stderr=tail)
+    return rc
+
+
+class Stalled(RuntimeError):
+    """ffmpeg tidak melaporkan progres selama batas waktu stall."""
+
+
+STALL_TIMEOUT = 120  # detik tanpa progres sebelum ffmpeg dihentikan (0 = nonaktif)
+
+
+def _fmt_eta(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _read_progress(stream, state):
+    """Baca blok key=value dari `-progress pipe:1` (dijalankan di thread)."""
+    block = {}
+    for line in stream:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value
+        if key != "progress":
+            continue
+        # satu blok selesai; dianggap progres hanya jika posisi/ukuran bertambah
+        try:
+            out_us = int(block.get("out_time_us") or block.get("out_time_ms") or 0)
+        except ValueError:
+            out_us = 0
+        mark = (out_us, block.get("total_size"), block.get("frame"))
+        if mark != state.get("mark"):
+            state["mark"] = mark
+            state["last_change"] = time.monotonic()
+        state["out_s"] = max(out_us, 0) / 1e6
+        state["frame"] = block.get("frame")
+        state["fps"] = block.get("fps")
+        state["speed"] = block.get("speed")
+        state["done"] = value == "end"
+        block = {}
+
+
+def run_ffmpeg(cmd, duration=None, cancel=None, stall_timeout=STALL_TIMEOUT,
+               label=None, report_every=5.0, poll=0.2, **kwargs):
+    """Jalankan ffmpeg dengan `-progress pipe:1`, laporkan fps/speed/ETA.
+
+    Seperti run_cancellable (bisa dibatalkan, stderr ikut di pesan error),
+    ditambah watchdog: jika tidak ada progres selama `stall_timeout` detik,
+    ffmpeg dihentikan dan Stalled dilempar. `duration` (detik, dari probe)
+    dipakai untuk persen & ETA. Mengembalikan ringkasan progres terakhir.
+    """
+    cmd = [cmd[0], "-nostats", "-progress", "pipe:1"] + list(cmd[1:])
+    label = label or os.path.basename(cmd[-1])
+    started = time.monotonic()
+    state = {"last_change": started, "out_s": 0.0, "done": False}
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err,
+                                text=True, errors="replace", **kwargs)
+        reader = threading.Thread(target=_read_progress, args=(proc.stdout, state), daemon=True)
+        reader.start()
+        next_report = started + report_every
+        try:
+            while True:
+                try:
+                    rc = proc.wait(timeout=poll)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                now = time.monotonic()
+                if cancel is not None and cancel.is_set():
+                    raise Cancelled(f"{label} dibatalkan")
+                if stall_timeout and now - state["last_change"] > stall_timeout:
+                    raise Stalled(f"{label}: tidak ada progres selama {stall_timeout:.0f}s, ffmpeg dihentikan")
+                if report_every and now >= next_report:
+                    next_report = now + report_every
+                    print(_progress_line(label, state, duration, now - started))
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            reader.join(timeout=1)
+            proc.stdout.close()
+        if rc != 0:
+            err.seek(0)
+            tail = err.read().decode(errors="replace").strip()[-500:]
+            raise subprocess.CalledProcessError(rc, cmd, stderr=tail)
+    elapsed = time.monotonic() - started
+    return {"elapsed_s": round(elapsed, 3), "frames": _to_float(state.get("frame")),
+            "fps": _to_float(state.get("fps")), "speed": _realtime_speed(state, elapsed)}
+
+
+def _to_float(value):
+    try:
+        return float(str(value).rstrip("x"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _realtime_speed(state, elapsed):
+    """Kelipatan realtime: nilai ffmpeg jika ada, jika tidak posisi/waktu berjalan."""
+    speed = _to_float(state.get("speed"))
+    if not speed and elapsed > 0 and state["out_s"] > 0:
+        speed = state["out_s"] / elapsed
+    return round(speed, 3) if speed else None
+
+
+def _progress_line(label, state, duration, elapsed):
+    parts = [f"⏳ {label}: {_fmt_eta(state['out_s'])}"]
+    if duration:
+        parts[0] += f" / {_fmt_eta(duration)} ({min(100.0, state['out_s'] / duration * 100):.0f}%)"
+    fps = _to_float(state.get("fps"))
+    if fps:
+        parts.append(f"{fps:.0f} fps")
+    speed = _realtime_speed(state, elapsed)
+    if speed:
+        parts.append(f"{speed:.2f}x")
+        if duration and duration > state["out_s"]:
+            parts.append(f"ETA {_fmt_eta((duration - state['out_s']) / speed)}")
+    return ", ".join(parts)
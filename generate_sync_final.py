@@ -1,14 +1,9 @@
-import os, glob, time, subprocess, sys, shutil, platform
+import os, glob, time, shutil, platform, tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from playwright.sync_api import sync_playwright
-
-# --- Auto install moviepy jika belum ada ---
-try:
-    from moviepy.editor import VideoFileClip, concatenate_videoclips
-except Exception:
-    print("📦 Installing moviepy ...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "moviepy==1.0.3"])
-    from moviepy.editor import VideoFileClip, concatenate_videoclips
+from ffmpeg_tools import probe_many, parse_rate, run_ffmpeg, STALL_TIMEOUT
+from manifest import Manifest, file_digest
+import metrics
 
 # --- Simple colored logs ---
 def green(t): return f"\033[92m{t}\033[0m"
@@ -22,6 +17,7 @@ INPUT = os.path.join(BASE, "input")
 OUTPUT = os.path.join(BASE, "output")
 PROFILES = os.path.join(BASE, "profiles")
 SAFE_VIDEO = os.path.join(INPUT, "video_safe.mp4")
+AUDIO_EXTS = (".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg")  # format seg_XX dari main.py
 
 for f in [INPUT, OUTPUT, PROFILES]:
     os.makedirs(f, exist_ok=True)
@@ -300,22 +296,124 @@ def monitor_and_download(ctx, page, idx):
             pass
 
 # --- Gabung video ---
-def merge_videos():
-    vids = sorted(glob.glob(os.path.join(OUTPUT, "result_seg_*.mp4")))
+def _stream_signature(info):
+    """Parameter stream yang harus sama agar bisa digabung dengan -c copy."""
+    v, a = info["video"], info["audio"]
+    vsig = None if v is None else (
+        v.get("codec_name"), v.get("profile"), v.get("width"), v.get("height"),
+        v.get("pix_fmt"), v.get("r_frame_rate"), v.get("time_base"))
+    asig = None if a is None else (
+        a.get("codec_name"), a.get("sample_rate"), a.get("channels"))
+    return vsig, asig
+
+def _concat_copy(vids, out_path, duration=None, stall_timeout=STALL_TIMEOUT):
+    """Gabung tanpa encode ulang via concat demuxer."""
+    list_path = out_path + ".txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for v in vids:
+            path = os.path.abspath(v).replace("\\", "/").replace("'", "'\\''")
+            f.write(f"file '{path}'\n")
+    try:
+        run_ffmpeg([
+            "ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", "-movflags", "+faststart", out_path
+        ], duration, stall_timeout=stall_timeout, label="gabung video")
+    finally:
+        os.remove(list_path)
+
+def _normalize_clip(src, info, dst, width, height, fps, with_audio, stall_timeout=STALL_TIMEOUT):
+    """Encode ulang satu klip ke spesifikasi bersama (untuk digabung -c copy)."""
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", src]
+    if with_audio and not info["audio"]:
+        # klip tanpa audio diisi hening sepanjang durasinya
+        cmd += ["-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo", "-shortest"]
+    cmd += [
+        "-map", "0:v:0",
+        "-vf", f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps:.3f},format=yuv420p",
+        "-c:v", "libx264", "-preset", "medium", "-crf", "23", "-video_track_timescale", "90000",
+    ]
+    if with_audio:
+        cmd += ["-map", "0:a:0" if info["audio"] else "1:a:0",
+                "-c:a", "aac", "-ar", "48000", "-ac", "2"]
+    else:
+        cmd += ["-an"]
+    run_ffmpeg(cmd + [dst], info["duration"], stall_timeout=stall_timeout,
+               label=f"seragamkan {os.path.basename(src)}")
+    return dst
+
+def _concat_reencode(vids, infos, out_path, window=2, stall_timeout=STALL_TIMEOUT):
+    """Seragamkan klip satu per satu, lalu gabung dengan concat demuxer.
+
+    Kanvas = resolusi terbesar (klip lebih kecil di-pad ke tengah, seperti
+    method="compose"), fps = fps tertinggi, audio 48 kHz stereo. Hanya
+    `window` klip yang dibuka bersamaan, jadi memori & handle tidak
+    bertambah dengan jumlah segmen.
+    """
+    even = lambda x: int(x) + (int(x) % 2)
+    width = even(max(i["video"]["width"] for i in infos))
+    height = even(max(i["video"]["height"] for i in infos))
+    fps = max(parse_rate(i["video"].get("r_frame_rate")) or 30 for i in infos)
+    with_audio = any(i["audio"] for i in infos)
+
+    tmp_dir = tempfile.mkdtemp(prefix="merge_", dir=os.path.dirname(out_path))
+    try:
+        jobs = [(v, info, os.path.join(tmp_dir, f"norm_{n:03d}.mp4"))
+                for n, (v, info) in enumerate(zip(vids, infos))]
+        with ThreadPoolExecutor(max_workers=window) as pool:
+            parts = list(pool.map(
+                lambda job: _normalize_clip(*job, width, height, fps, with_audio, stall_timeout), jobs))
+        _concat_copy(parts, out_path, _total_duration(infos), stall_timeout)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def _total_duration(infos):
+    durations = [i["duration"] for i in infos]
+    return sum(durations) if all(durations) else None
+
+def merge_videos(out_dir=OUTPUT, stall_timeout=STALL_TIMEOUT):
+    """Gabung result_seg_*.mp4 di `out_dir`; mengembalikan path final atau None."""
+    manifest = Manifest(os.path.join(out_dir, "manifest.json"), os.path.dirname(out_dir))
+    vids = sorted(glob.glob(os.path.join(out_dir, "result_seg_*.mp4")))
+    segments = manifest.outputs("slice")
+    if segments:
+        # hanya klip yang nomornya sesuai potongan audio saat ini (seg_NN -> result_seg_NN)
+        wanted = {f"result_{os.path.splitext(os.path.basename(p))[0]}.mp4" for p in segments}
+        vids = [v for v in vids if os.path.basename(v) in wanted]
     if not vids:
         print(yellow("⚠️ Tidak ada video untuk digabung."))
-        return
+        return None
+    inputs = {"clips": {os.path.basename(v): file_digest(v) for v in vids}}
+    if manifest.is_fresh("merge", inputs):
+        final = manifest.outputs("merge")[0]
+        print(yellow(f"⏭️ Klip tidak berubah, final sudah ada: {final}"))
+        return final
     print(blue(f"🎬 Menggabungkan {len(vids)} video..."))
-    clips = [VideoFileClip(v) for v in vids]
-    final = concatenate_videoclips(clips, method="compose")
-    base = os.path.join(OUTPUT, "final_combined.mp4")
+    base = os.path.join(out_dir, "final_combined.mp4")
     i = 1
     while os.path.exists(base):
-        base = os.path.join(OUTPUT, f"final_combined_{i}.mp4")
+        base = os.path.join(out_dir, f"final_combined_{i}.mp4")
         i += 1
-    final.write_videofile(base, codec="libx264", audio_codec="aac")
+    try:
+        infos = probe_many(vids)
+        if any(info["video"] is None for info in infos):
+            raise RuntimeError("ada file tanpa stream video")
+        compatible = len({_stream_signature(info) for info in infos}) == 1
+        with metrics.stage("merge", clips=len(vids), mode="copy" if compatible else "reencode") as m:
+            m.bytes_read = sum(os.path.getsize(v) for v in vids)
+            if compatible:
+                print(blue("⚡ Stream identik, gabung tanpa encode ulang (-c copy)..."))
+                _concat_copy(vids, base, _total_duration(infos), stall_timeout)
+            else:
+                print(yellow("ℹ️ Format klip berbeda, encode ulang dengan ffmpeg..."))
+                _concat_reencode(vids, infos, base, stall_timeout=stall_timeout)
+            m.bytes_written = os.path.getsize(base)
+    except Exception as e:
+        print(red(f"❌ Gagal menggabungkan video: {e}"))
+        return None
+    manifest.record("merge", inputs, [base])
     print(green(f"✅ Final tersimpan di: {base}"))
     beep()
+    return base
 
 # --- Reset folder ---
 def reset_folders():
@@ -337,11 +435,13 @@ def main():
     if not convert_video(): 
         return
 
-    audio_files = sorted(glob.glob(os.path.join(OUTPUT, "seg_*.mp3")))
+    audio_files = sorted(f for f in glob.glob(os.path.join(OUTPUT, "seg_*.*"))
+                         if f.lower().endswith(AUDIO_EXTS))
     if not audio_files:
         print(red("⚠️ Tidak ada file segmen audio di folder output/."))
         return
 
+    from playwright.sync_api import sync_playwright  # hanya saat generate, bukan saat merge/import
     with sync_playwright() as pw:
         sessions = []
         for i, audio in enumerate(audio_files):
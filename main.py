@@ -1,29 +1,53 @@
 # ============================================================
-# main.py — Full Color (Rich) wrapper around the original logic
-# (Behavior unchanged; only console output/styling changed)
+# main.py — media-prep pipeline: potong audio per jeda (scan streaming +
+# perencana potong), konversi video (cache, profil kecepatan), manifest
+# stage untuk run ulang, lalu lanjut ke signup. Output berwarna via rich.
 # ============================================================
 
+import argparse
+import bisect
+import glob
+import hashlib
+import heapq
 import os
+import json
+import struct
 import subprocess
 import sys
-from tkinter import Tk, filedialog
-from pydub import AudioSegment, silence
+import tempfile
+import threading
+import time
 import shutil
 import builtins
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from contextlib import contextmanager
 from datetime import datetime
+from ffmpeg_tools import probe, parse_rate, run_cancellable, run_ffmpeg, Cancelled, STALL_TIMEOUT
+from manifest import Manifest, file_digest
+import metrics
 
 # --- rich console for colored output ---
-try:
-    from rich.console import Console
-    console = Console()
-except Exception:
-    console = None
+# Dibuat saat print pertama, bukan saat import (rich lambat dimuat)
+console = None
+_console_loaded = False
+
+def _get_console():
+    global console, _console_loaded
+    if not _console_loaded:
+        try:
+            from rich.console import Console
+            console = Console()
+        except Exception:
+            console = None
+        _console_loaded = True
+    return console
 
 # Enhanced log function (keperluan konsistensi)
 def log(msg: str, color: str = "white", emoji: str = None):
     time_str = datetime.now().strftime("%H:%M:%S")
     prefix = f"{emoji} " if emoji else ""
-    if console:
+    if _get_console():
         console.print(f"[{time_str}] {prefix}[{color}]{msg}[/{color}]")
     else:
         builtins.print(f"[{time_str}] {prefix}{msg}")
@@ -32,23 +56,25 @@ def log(msg: str, color: str = "white", emoji: str = None):
 _original_print = builtins.print
 def _rich_print(*args, **kwargs):
     txt = " ".join(str(a) for a in args)
-    if console:
+    if _get_console():
         console.print(txt)
     else:
         _original_print(txt)
 builtins.print = _rich_print
 
 # -----------------------
-# Original main.py content below (unchanged logic)
+# Pipeline
 # -----------------------
 
 # Fungsi untuk memilih file
 def pilih_file_audio():
+    from tkinter import Tk, filedialog  # hanya mode interaktif (server tanpa display tidak butuh Tk)
     Tk().withdraw()  # Menyembunyikan jendela utama Tkinter
     file_audio = filedialog.askopenfilename(title="Pilih file audio", filetypes=[("Audio Files", "*.wav *.mp3")])
     return file_audio
 
 def pilih_file_video():
+    from tkinter import Tk, filedialog
     Tk().withdraw()  # Menyembunyikan jendela utama Tkinter
     file_video = filedialog.askopenfilename(title="Pilih file video", filetypes=[("Video Files", "*.mp4 *.avi *.mov")])
     return file_video
@@ -82,124 +108,929 @@ PROFILES = os.path.join(BASE, "profiles")
 os.makedirs(INPUT, exist_ok=True)
 os.makedirs(OUTPUT, exist_ok=True)
 os.makedirs(PROFILES, exist_ok=True)
+# Cache konversi di luar input/output agar tidak ikut terhapus reset_folders()
+CACHE = os.path.join(BASE, "cache", "convert")
+CONVERT_CACHE_MAX_BYTES = 5 * 1024 ** 3  # 5 GB
+CONVERT_STATS = os.path.join(BASE, "cache", "convert_stats.json")
+MANIFEST = os.path.join(OUTPUT, "manifest.json")
+os.makedirs(CACHE, exist_ok=True)
+
+# --- Peta jeda (silence) satu kali scan, vektor NumPy ---
+class SilenceIndex:
+    """Indeks jeda terurut untuk satu file audio.
+
+    Menyimpan run posisi awal jendela yang "hening" (RMS jendela
+    `min_silence_len` ms <= threshold), dengan semantik yang sama seperti
+    `pydub.silence.detect_silence` (seek_step=1 ms).
+    """
+
+    def __init__(self, run_starts, run_ends, min_silence_len, duration_ms):
+        self.run_starts = run_starts  # awal run (ms), terurut
+        self.run_ends = run_ends      # akhir run (ms, inklusif)
+        self.min_silence_len = min_silence_len
+        self.duration_ms = duration_ms
+
+    def last_silent_start(self, lo, hi):
+        """Posisi awal jendela hening terakhir di [lo, hi], atau None."""
+        if hi < lo:
+            return None
+        import numpy as np
+        k = int(np.searchsorted(self.run_starts, hi, side="right")) - 1
+        if k < 0:
+            return None
+        start = min(int(self.run_ends[k]), hi)
+        return start if start >= lo else None
+
+    def intervals(self):
+        """Daftar [start, end] jeda (ms), digabung persis seperti pydub."""
+        ranges = []
+        for a, b in zip(self.run_starts.tolist(), self.run_ends.tolist()):
+            if ranges and a <= ranges[-1][1]:
+                ranges[-1][1] = b + self.min_silence_len
+            else:
+                ranges.append([a, b + self.min_silence_len])
+        return ranges
+
+
+# --- Pembaca audio streaming (baca WAV per chunk / pipe ffmpeg) ---
+def _read_wav_header(path):
+    """Baca chunk RIFF `fmt ` dan `data`; None jika bukan WAV PCM."""
+    with open(path, "rb") as f:
+        head = f.read(12)
+        if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            cid = chunk[:4]
+            size = struct.unpack("<I", chunk[4:])[0]
+            if cid == b"fmt ":
+                body = f.read(size)
+                tag, channels, rate = struct.unpack("<HHI", body[:8])
+                bits = struct.unpack("<H", body[14:16])[0]
+                if tag == 0xFFFE and len(body) >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]  # WAVE_FORMAT_EXTENSIBLE
+                fmt = (tag, channels, rate, bits)
+            elif cid == b"data":
+                if fmt is None or fmt[0] != 1 or fmt[3] not in (8, 16, 24, 32):
+                    return None
+                offset = f.tell()
+                # header streaming kadang menulis size 0/0xFFFFFFFF
+                avail = os.path.getsize(path) - offset
+                if size == 0 or size > avail:
+                    size = avail
+                return fmt[1], fmt[2], fmt[3] // 8, offset, size
+            else:
+                f.seek(size + (size & 1), 1)
+
+
+def _probe_audio(path):
+    """Ambil sample rate & jumlah channel via ffprobe."""
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0",
+         "-show_entries", "stream=sample_rate,channels", "-of", "json", path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    stream = json.loads(out)["streams"][0]
+    return int(stream["sample_rate"]), int(stream["channels"])
+
+
+class AudioSource:
+    """Sumber audio yang dibaca per chunk, tanpa memuat seluruh file.
+
+    WAV PCM dibaca per chunk dengan seek + np.fromfile (hanya satu chunk
+    di memori, bukan peta seluruh file); format lain (mp3, dll.) di-decode
+    ffmpeg ke PCM 16-bit melalui pipe. Sampel dikembalikan sebagai array
+    (frames, channels): uint8 untuk 8-bit, int16, atau int32 (24/32-bit).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        wav = _read_wav_header(path)
+        if wav:
+            channels, rate, width, offset, size = wav
+            n_frames = size // (channels * width)
+            self._wav = (offset, width)
+            self.frame_rate, self.channels = rate, channels
+            # 24-bit dinaikkan ke 32-bit, sama seperti pydub
+            self.sample_width = 4 if width == 3 else width
+            self.n_frames = n_frames
+        else:
+            self._wav = None
+            self.frame_rate, self.channels = _probe_audio(path)
+            self.sample_width = 2
+            self.n_frames = None  # baru diketahui setelah stream habis
+
+    def chunks(self, chunk_frames):
+        """Iterasi array (frames, channels) berukuran maksimal `chunk_frames`."""
+        import numpy as np
+        if self._wav is not None:
+            offset, width = self._wav
+            dtype = {1: np.uint8, 2: np.int16, 3: np.uint8, 4: np.int32}[width]
+            per_frame = self.channels * (3 if width == 3 else 1)
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                for f0 in range(0, self.n_frames, chunk_frames):
+                    n = min(chunk_frames, self.n_frames - f0)
+                    block = np.fromfile(f, dtype=dtype, count=n * per_frame)
+                    if len(block) < n * per_frame:
+                        raise RuntimeError(f"WAV terpotong: {self.path}")
+                    if width == 3:
+                        b = block.reshape(n, self.channels, 3).astype(np.int32)
+                        yield (b[..., 0] << 8) | (b[..., 1] << 16) | (b[..., 2] << 24)
+                    else:
+                        yield block.reshape(n, self.channels)
+            return
+
+        cmd = ["ffmpeg", "-v", "error", "-i", self.path, "-f", "s16le",
+               "-acodec", "pcm_s16le", "-ar", str(self.frame_rate),
+               "-ac", str(self.channels), "pipe:1"]
+        frame_width = 2 * self.channels
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        finished = False
+        try:
+            pending = b""
+            while True:
+                data = proc.stdout.read(chunk_frames * frame_width)
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % frame_width
+                pending = data[usable:]
+                if usable:
+                    yield np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, self.channels)
+            finished = True
+        finally:
+            if not finished:
+                proc.kill()  # pembaca berhenti di tengah (error/dibatalkan)
+            proc.stdout.close()
+            if proc.wait() != 0 and finished:
+                raise RuntimeError(f"ffmpeg gagal men-decode {self.path}")
+
+
+def _ms_to_frame(ms, frame_rate):
+    # pembulatan ms -> frame sama seperti slicing pydub
+    return int(ms * frame_rate / 1000.0)
+
+
+def build_silence_index(source, min_silence_len, silence_thresh, chunk_ms=30000, cancel=None):
+    """Hitung peta jeda seluruh file dalam satu pass streaming.
+
+    Energi dihitung per milidetik lalu dijumlah kumulatif, sehingga RMS
+    setiap jendela `min_silence_len` cukup satu pengurangan. Antar chunk
+    hanya energi `min_silence_len` ms terakhir yang dibawa (overlap),
+    jadi memori tetap datar berapapun panjang audionya.
+    """
+    import numpy as np
+    fr, channels, width = source.frame_rate, source.channels, source.sample_width
+    acc_dtype = np.int64 if width <= 2 else np.float64
+    thresh = (10 ** (silence_thresh / 20.0)) * (2 ** (width * 8 - 1))
+    L = min_silence_len
+
+    runs_s, runs_e = [], []
+    state = {"next_start": 0}
+    tail = np.zeros(0, dtype=acc_dtype)  # energi ms [tail_base, ms_done)
+    tail_base = 0
+    ms_done = 0
+    frames_seen = 0
+    pending = None  # frame sisa dari ms yang belum lengkap
+
+    def scan(energy, base, last_start):
+        # cari jendela hening untuk posisi awal next_start..last_start
+        first = state["next_start"]
+        if last_start < first:
+            return
+        cum = np.zeros(len(energy) + 1, dtype=acc_dtype)
+        np.cumsum(energy, out=cum[1:])
+        starts = np.arange(first, last_start + 1)
+        ends = starts + L
+        counts = ((ends * fr / 1000.0).astype(np.int64)
+                  - (starts * fr / 1000.0).astype(np.int64)) * channels
+        win = (cum[ends - base] - cum[starts - base]).astype(np.float64)
+        rms = np.floor(np.sqrt(win / np.maximum(counts, 1)))
+        silent = rms <= thresh
+        edges = np.diff(np.concatenate(([0], silent.view(np.int8), [0])))
+        for a, b in zip(np.flatnonzero(edges == 1) + first,
+                        np.flatnonzero(edges == -1) - 1 + first):
+            if runs_e and runs_e[-1] == a - 1:
+                runs_e[-1] = int(b)  # lanjutan run dari chunk sebelumnya
+            else:
+                runs_s.append(int(a))
+                runs_e.append(int(b))
+        state["next_start"] = last_start + 1
+
+    def block_energy(frames, m0, m1, f0):
+        # energi per ms untuk ms [m0, m1) dari frame yang dimulai di f0
+        x = frames.astype(acc_dtype)
+        if source.sample_width == 1:
+            x -= 128  # WAV 8-bit unsigned
+        fe = (x * x).sum(axis=1)
+        idx = (np.arange(m0, m1) * fr / 1000.0).astype(np.int64) - f0
+        valid = idx < len(fe)
+        out = np.zeros(m1 - m0, dtype=acc_dtype)
+        if valid.any():
+            out[valid] = np.add.reduceat(fe, idx[valid])
+        return out
+
+    started, cpu_started = time.perf_counter(), metrics.cpu_time()
+    # waktu baca + konversi sampel (file/pipe) dipisah dari waktu scan
+    decode_s = decode_cpu = 0.0
+    chunks = source.chunks(max(1, fr * chunk_ms // 1000))
+    while True:
+        t, c = time.perf_counter(), metrics.cpu_time()
+        frames = next(chunks, None)
+        decode_s += time.perf_counter() - t
+        decode_cpu += metrics.cpu_time() - c
+        if frames is None:
+            break
+        if cancel is not None and cancel.is_set():
+            raise Cancelled("scan jeda dibatalkan")
+        if pending is not None:
+            frames = np.concatenate((pending, frames))
+        f0 = _ms_to_frame(ms_done, fr)
+        frames_seen = f0 + len(frames)
+        # ms lengkap = ms yang batas akhirnya sudah terbaca
+        m1 = int(frames_seen * 1000.0 / fr)
+        while _ms_to_frame(m1 + 1, fr) <= frames_seen:
+            m1 += 1
+        while _ms_to_frame(m1, fr) > frames_seen:
+            m1 -= 1
+        used = _ms_to_frame(m1, fr) - f0
+        energy = block_energy(frames[:used], ms_done, m1, f0)
+        pending = frames[used:]
+        ext = np.concatenate((tail, energy))
+        scan(ext, tail_base, m1 - L)
+        ms_done = m1
+        keep = min(len(ext), L)
+        tail = ext[len(ext) - keep:]
+        tail_base = ms_done - keep
+
+    # sisa frame + ms terakhir (pydub membulatkan durasi ke ms terdekat)
+    duration_ms = int(round(frames_seen * 1000.0 / fr))
+    if pending is not None and duration_ms > ms_done:
+        energy = block_energy(pending, ms_done, duration_ms, _ms_to_frame(ms_done, fr))
+        ext = np.concatenate((tail, energy))
+        scan(ext, tail_base, duration_ms - L)
+
+    source.n_frames = frames_seen
+    metrics.record("decode", decode_s, decode_cpu, bytes_read=os.path.getsize(source.path),
+                   reader="wav" if source._wav is not None else "ffmpeg", **metrics.rss_fields())
+    metrics.record("silence_scan", time.perf_counter() - started - decode_s,
+                   metrics.cpu_time() - cpu_started - decode_cpu,
+                   duration_ms=duration_ms, silent_runs=len(runs_s), **metrics.rss_fields())
+    return SilenceIndex(np.array(runs_s, dtype=np.int64), np.array(runs_e, dtype=np.int64),
+                        L, duration_ms)
+
+
+def plan_cuts_greedy(index, chunk_target_ms, silence_search_back_ms):
+    """Titik potong (ms) dengan aturan lama: jeda terakhir <= 8 detik sebelum target."""
+    duration = index.duration_ms
+    min_silence_len = index.min_silence_len
+    cuts = []
+    pos = 0
+    while pos < duration:
+        target_end = pos + chunk_target_ms
+        if target_end > duration:
+            target_end = duration
+
+        # jeda terakhir yang seluruhnya berada di dalam jendela [pos, target_end]
+        last_start = index.last_silent_start(pos, target_end - min_silence_len)
+
+        cut_point_absolute = target_end  # fallback = potong paksa di target
+
+        if last_start is not None:
+            end_silence = last_start + min_silence_len - pos
+            if end_silence >= ((target_end - pos) - silence_search_back_ms):
+                cut_point_absolute = pos + end_silence
+
+        if target_end == duration:
+            cut_point_absolute = duration
+
+        if cut_point_absolute <= pos:
+            if target_end == duration:
+                break
+            else:
+                cut_point_absolute = target_end
+
+        cuts.append(cut_point_absolute)
+        pos = cut_point_absolute
+    return cuts
+
+
+def _pause_at(intervals, starts, pos):
+    """Jeda [start, end] yang memuat `pos`, atau None."""
+    k = bisect.bisect_right(starts, pos) - 1
+    if k >= 0 and intervals[k][1] >= pos:
+        return intervals[k]
+    return None
+
+
+def count_forced_cuts(index, cuts):
+    """Jumlah titik potong (selain akhir file) yang tidak jatuh di dalam jeda."""
+    intervals = index.intervals()
+    starts = [a for a, _ in intervals]
+    return sum(1 for c in cuts if c < index.duration_ms
+               and _pause_at(intervals, starts, c) is None)
+
+
+def plan_cuts_optimal(index, max_segment_ms, search_back_ms=None):
+    """Titik potong (ms) optimal global dengan dynamic programming.
+
+    Kandidat potong = awal/akhir setiap jeda di seluruh file, plus titik
+    batas `max_segment_ms` bila jatuh di tengah jeda. Biaya tiap rencana
+    dibandingkan berurutan: (1) jumlah segmen, (2) jumlah potong paksa di
+    tengah suara, (3) jumlah kuadrat selisih durasi segmen terhadap batas —
+    agar tidak ada potongan sisa yang sangat pendek. Segmen yang seluruhnya
+    berada di dalam satu jeda (hening murni) hanya dipakai jika tidak ada
+    langkah lain, yaitu pada jeda yang lebih panjang dari batas. Hasil tidak pernah lebih banyak segmen atau potong paksa
+    dibanding plan_cuts_greedy pada indeks yang sama.
+    """
+    duration = index.duration_ms
+    if duration <= 0:
+        return []
+    intervals = index.intervals()
+    starts = [a for a, _ in intervals]
+    candidates = sorted({p for iv in intervals for p in iv if 0 < p < duration})
+
+    best = {0: ((0, 0, 0), None)}
+    heap = [0]
+    done = set()
+    while heap:
+        pos = heapq.heappop(heap)
+        if pos in done:
+            continue
+        done.add(pos)
+        if pos == duration:
+            break
+        cost = best[pos][0]
+
+        if duration - pos <= max_segment_ms:
+            steps = [(duration, 0)]
+        else:
+            limit = pos + max_segment_ms
+            lo = bisect.bisect_right(candidates, pos)
+            hi = bisect.bisect_right(candidates, limit)
+            steps = [(c, 0) for c in candidates[lo:hi]]
+            pause = _pause_at(intervals, starts, limit)
+            if pause is None:
+                steps.append((limit, 1))  # potong paksa di tengah suara
+            elif pause[0] < limit < pause[1]:
+                steps.append((limit, 0))  # batas jatuh di tengah jeda
+            here = _pause_at(intervals, starts, pos)
+            if here is not None and pos < here[1]:
+                # [pos, nxt] dengan nxt <= akhir jeda = segmen hening murni
+                steps = [st for st in steps if st[0] > here[1]] or steps
+
+        for nxt, forced in steps:
+            gap = max_segment_ms - (nxt - pos)
+            new_cost = (cost[0] + 1, cost[1] + forced, cost[2] + gap * gap)
+            if nxt not in best or new_cost < best[nxt][0]:
+                best[nxt] = (new_cost, pos)
+                heapq.heappush(heap, nxt)
+
+    cuts = []
+    pos = duration
+    while pos:
+        cuts.append(pos)
+        pos = best[pos][1]
+    cuts.reverse()
+
+    # jaring pengaman: jangan pernah lebih buruk dari perencana lama
+    if search_back_ms is None:
+        search_back_ms = SILENCE_SEARCH_BACK_MS
+    greedy = plan_cuts_greedy(index, max_segment_ms, search_back_ms)
+    if len(greedy) < len(cuts) or count_forced_cuts(index, greedy) < count_forced_cuts(index, cuts):
+        return greedy
+    return cuts
+
+
+# Mode perencana potong: "optimal" (DP) atau "greedy" (perilaku lama, reprodusibel)
+CUT_MODES = ("optimal", "greedy")
+
+
+def _fmt_seconds(ms):
+    return f"{ms / 1000.0:.3f}"
+
+
+# Format output potongan: ekstensi (None = ikut file sumber) + opsi codec ffmpeg
+SEGMENT_FORMATS = {
+    "mp3": (".mp3", ["-f", "mp3"]),
+    "wav": (".wav", ["-c:a", "pcm_s16le"]),
+    "flac": (".flac", ["-c:a", "flac"]),
+    "copy": (None, ["-c:a", "copy"]),  # tanpa encode, potong di batas paket
+}
+
+
+def _segment_name(i, audio_file, fmt):
+    ext = SEGMENT_FORMATS[fmt][0] or os.path.splitext(audio_file)[1].lower()
+    return f"seg_{i:02d}{ext}"
+
+
+def export_segments_ffmpeg(audio_file, cuts, out_dir, fmt="mp3", cancel=None):
+    """Tulis semua potongan dengan satu proses ffmpeg.
+
+    Input di-decode sekali; setiap output memakai `-ss/-to` sendiri
+    sehingga tidak ada proses encoder dan salinan PCM per potongan.
+    Mengembalikan daftar (path, durasi_ms).
+    """
+    codec = SEGMENT_FORMATS[fmt][1]
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", os.path.abspath(audio_file)]
+    segments = []
+    prev = 0
+    for i, cut in enumerate(cuts, start=1):
+        name = _segment_name(i, audio_file, fmt)
+        cmd += ["-map", "0:a:0", "-ss", _fmt_seconds(prev)]
+        if i < len(cuts):
+            cmd += ["-to", _fmt_seconds(cut)]
+        cmd += codec + [name]
+        segments.append((os.path.join(out_dir, name), cut - prev))
+        prev = cut
+    # nama relatif + cwd agar command line tetap pendek (batas Windows)
+    try:
+        run_cancellable(cmd, cancel, cwd=out_dir)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg gagal memotong audio: {e.stderr}")
+    return segments
+
+
+def _encode_segment(audio_file, start_ms, end_ms, output_path, fmt, stop):
+    # seek di input agar tiap worker hanya decode bagiannya
+    cmd = ["ffmpeg", "-y", "-v", "error", "-ss", _fmt_seconds(start_ms)]
+    if end_ms is not None:
+        cmd += ["-to", _fmt_seconds(end_ms)]
+    cmd += ["-i", audio_file, "-map", "0:a:0"] + SEGMENT_FORMATS[fmt][1] + [output_path]
+    started = time.perf_counter()
+    try:
+        run_cancellable(cmd, stop)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg gagal encode {output_path}: {e.stderr}") from None
+    return time.perf_counter() - started
+
+
+def export_segments_parallel(audio_file, cuts, out_dir, fmt="mp3", workers=None, cancel=None):
+    """Encode potongan secara paralel, maksimal `workers` proses ffmpeg sekaligus.
+
+    Semua titik potong sudah dihitung di depan, jadi penomoran seg_NN tetap
+    deterministik berapapun urutan selesainya worker. Pekerjaan berat ada di
+    proses ffmpeg, jadi cukup thread; saat satu potongan gagal atau stage
+    dibatalkan, antrean dibuang dan ffmpeg yang sedang jalan langsung dihentikan.
+    """
+    audio_file = os.path.abspath(audio_file)
+    jobs = []
+    prev = 0
+    for i, cut in enumerate(cuts, start=1):
+        path = os.path.join(out_dir, _segment_name(i, audio_file, fmt))
+        jobs.append((prev, cut if i < len(cuts) else None, path, cut - prev))
+        prev = cut
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_encode_segment, audio_file, start, end, path, fmt, stop)
+                   for start, end, path, _ in jobs]
+        try:
+            for n, future in enumerate(futures, start=1):
+                while True:
+                    try:
+                        elapsed = future.result(timeout=0.2)  # lempar error pertama sesuai urutan segmen
+                        metrics.record("export_segment", elapsed, segment=n,
+                                       bytes_written=os.path.getsize(jobs[n - 1][2]))
+                        break
+                    except FuturesTimeout:
+                        if cancel is not None and cancel.is_set():
+                            raise Cancelled("encode potongan dibatalkan")
+        except BaseException:
+            stop.set()  # hentikan ffmpeg yang sedang berjalan
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return [(path, duration) for _, _, path, duration in jobs]
+
+
+# Parameter pemotongan audio
+CHUNK_TARGET_MS = 59 * 1000  # target 59 detik
+SILENCE_SEARCH_BACK_MS = 8000  # maksimal mundur 8 detik untuk cari jeda (mode greedy)
+MIN_SILENCE_LEN = 500  # 0.5 detik jeda
+SILENCE_THRESH = -45  # threshold dB (atur sesuai audio)
+AUDIO_EXTS = (".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg")
 
 # Fungsi untuk memotong audio
-def slice_audio(AUDIO_FILE):
+def slice_audio(AUDIO_FILE, fmt="mp3", workers=1, cut_mode="optimal", cancel=None, out_dir=None):
+    """Potong audio di `out_dir`; mengembalikan daftar path potongan ([] jika gagal)."""
+    out_dir = out_dir or OUTPUT
     try:
         if not os.path.exists(AUDIO_FILE):
             print(f"⚠️ File audio tidak ditemukan: {AUDIO_FILE}")
-            return 0
+            return []
 
         print(f"🎧 Memotong {AUDIO_FILE} (mencari jeda)...")
-        audio = AudioSegment.from_wav(AUDIO_FILE)
-        
-        chunk_target_ms = 59 * 1000  # target 59 detik
-        silence_search_back_ms = 8000  # maksimal mundur 8 detik untuk cari jeda
-        min_silence_len = 500  # 0.5 detik jeda
-        silence_thresh = -45  # threshold dB (atur sesuai audio)
-        
-        pos = 0
-        i = 1
-        total_segments = 0
-        
-        while pos < len(audio):
-            target_end = pos + chunk_target_ms
-            if target_end > len(audio):
-                target_end = len(audio)
-            
-            segment_to_check = audio[pos:target_end]
-            
-            silences = silence.detect_silence(
-                segment_to_check,
-                min_silence_len=min_silence_len,
-                silence_thresh=silence_thresh
-            )
-            
-            cut_point_absolute = target_end  # fallback = potong paksa di target
-            
-            if silences:
-                start_silence, end_silence = silences[-1]
-                if end_silence >= (len(segment_to_check) - silence_search_back_ms):
-                    cut_point_absolute = pos + end_silence 
-
-            if target_end == len(audio):
-                cut_point_absolute = len(audio)
-            
-            if cut_point_absolute <= pos:
-                if target_end == len(audio):
-                    break
-                else:
-                    cut_point_absolute = target_end
-
-            final_segment = audio[pos:cut_point_absolute]
-            output_path = os.path.join(OUTPUT, f"seg_{i:02d}.mp3")
-            final_segment.export(output_path, format="mp3")
-            print(f"✅ dibuat: {output_path} (Durasi: {len(final_segment)/1000.0}s)")
-            
-            total_segments += 1
-            pos = cut_point_absolute
-            i += 1
-            if pos == len(audio):
-                break
+        source = AudioSource(AUDIO_FILE)
+
+        # Scan jeda sekali untuk seluruh file (streaming)
+        index = build_silence_index(source, MIN_SILENCE_LEN, SILENCE_THRESH, cancel=cancel)
+        if cut_mode == "greedy":
+            cuts = plan_cuts_greedy(index, CHUNK_TARGET_MS, SILENCE_SEARCH_BACK_MS)
+        else:
+            cuts = plan_cuts_optimal(index, CHUNK_TARGET_MS)
+        print(f"✂️ Rencana potong ({cut_mode}): {len(cuts)} segmen")
+
+        parallel = bool(workers and workers > 1)
+        with metrics.stage("export", fmt=fmt, segments=len(cuts),
+                           mode="parallel" if parallel else "oneshot") as m:
+            if parallel:
+                segments = export_segments_parallel(AUDIO_FILE, cuts, out_dir, fmt, workers, cancel)
+            else:
+                segments = export_segments_ffmpeg(AUDIO_FILE, cuts, out_dir, fmt, cancel)
+            m.bytes_written = sum(os.path.getsize(p) for p, _ in segments)
+        for output_path, duration_ms in segments:
+            print(f"✅ dibuat: {output_path} (Durasi: {duration_ms/1000.0}s)")
+
+        print(f"\nTotal potongan audio: {len(segments)}")
+        return [output_path for output_path, _ in segments]
 
-        print(f"\nTotal potongan audio: {total_segments}")
-        return total_segments 
-        
     except Exception as e:
         print(f"❌ Gagal memotong audio: {e}")
-        return 0 
+        return []
+
+# --- Cache konversi video (content-addressed, LRU berbasis ukuran) ---
+def _cache_key(src, params):
+    # hash isi video sumber + parameter ffmpeg -> nama entri cache
+    h = hashlib.sha256(file_digest(src).encode())
+    h.update(json.dumps(params).encode())
+    return h.hexdigest()
+
+
+def _cache_evict(max_bytes, keep=None):
+    """Hapus entri paling lama tidak dipakai sampai total <= max_bytes."""
+    entries = []
+    for name in os.listdir(CACHE):
+        path = os.path.join(CACHE, name)
+        # .part.mp4 = konversi yang sedang berjalan (bukan entri cache)
+        if path != keep and name.endswith(".mp4") and not name.endswith(".part.mp4") \
+                and os.path.isfile(path):
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    if keep and os.path.exists(keep):
+        total += os.path.getsize(keep)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            print(f"🧹 Cache dihapus (LRU): {os.path.basename(path)}")
+        except OSError:
+            pass
+
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+@contextmanager
+def _cache_lock(key, cancel=None):
+    """Satu konversi per entri cache; job lain dengan kunci sama menunggu (batch)."""
+    if key is None:
+        yield
+        return
+    with _key_locks_guard:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    while not lock.acquire(timeout=0.2):
+        if cancel is not None and cancel.is_set():
+            raise Cancelled("menunggu konversi lain dibatalkan")
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def _place_cached(entry, dst):
+    # hard link bila bisa (instan), kalau tidak salin
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(entry, dst)
+    except OSError:
+        shutil.copyfile(entry, dst)
+
+
+# Parameter ffmpeg konversi "aman" (H.264 + AAC) — ikut menentukan kunci cache
+CONVERT_ARGS = [
+    "-vf", "scale=1280:-2,fps=30,format=yuv420p",
+    "-c:v", "libx264", "-preset", "medium", "-crf", "23",
+    "-c:a", "aac", "-b:a", "128k",
+    "-movflags", "+faststart",
+]
+AUDIO_ARGS = ["-c:a", "aac", "-b:a", "128k"]
+
+# Profil kecepatan: preset x264 (None = video tidak di-encode ulang)
+CONVERT_PROFILES = {
+    "medium": "medium",      # default, sama dengan perintah lama
+    "fast": "fast",
+    "veryfast": "veryfast",
+    "ultrafast": "ultrafast",
+    "audio-only": None,      # video di-copy, hanya audio yang di-encode ulang
+}
+# Perkiraan kasar waktu encode relatif terhadap preset medium
+PRESET_SPEED = {"medium": 1.0, "fast": 0.8, "veryfast": 0.45, "ultrafast": 0.25}
+
+
+def _is_safe_video(info):
+    """True jika stream video sudah H.264 1280px / 30 fps / yuv420p."""
+    v = info["video"]
+    fps = parse_rate(v.get("r_frame_rate")) if v else None
+    return bool(
+        v and v.get("codec_name") == "h264" and v.get("width") == 1280
+        and v.get("height", 1) % 2 == 0 and v.get("pix_fmt") == "yuv420p"
+        and fps and abs(fps - 30) < 0.01
+    )
+
+
+def _is_safe_audio(info):
+    a = info["audio"]
+    return a is None or a.get("codec_name") == "aac"
+
+
+def _convert_plan(info, profile, threads):
+    """Pilih argumen ffmpeg: (args, mode). mode = remux / audio-only / profil."""
+    if info and _is_safe_video(info):
+        if _is_safe_audio(info):
+            args, mode = ["-c", "copy"], "remux"
+        else:
+            args, mode = ["-c:v", "copy"] + AUDIO_ARGS, "audio-only"
+    elif CONVERT_PROFILES[profile] is None:
+        print("⚠️ Profil audio-only: video sumber tidak di-encode ulang (belum tentu format aman).")
+        args, mode = ["-c:v", "copy"] + AUDIO_ARGS, "audio-only"
+    else:
+        args = list(CONVERT_ARGS)
+        args[args.index("-preset") + 1] = CONVERT_PROFILES[profile]
+        mode = profile
+    if mode in ("remux", "audio-only"):
+        args = args + ["-movflags", "+faststart"]
+    if threads:
+        args = ["-threads", str(threads)] + args
+    return args, mode
+
+
+def _load_convert_stats():
+    try:
+        with open(CONVERT_STATS, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _report_time_saved(mode, elapsed, duration):
+    """Bandingkan dengan perintah lama (preset medium), lalu simpan statistik.
+
+    Statistik = detik encode per detik video untuk tiap mode; jika belum
+    ada data medium, dipakai perkiraan PRESET_SPEED dan pesan ditandai
+    sebagai estimasi.
+    """
+    stats = _load_convert_stats()
+    # hit cache tidak dicatat sebagai kecepatan encode
+    if duration and mode != "cache":
+        rate = elapsed / duration
+        old = stats.get(mode)
+        stats[mode] = rate if old is None else 0.7 * old + 0.3 * rate
+        try:
+            with open(CONVERT_STATS, "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+        except OSError:
+            pass
+    if mode == "medium":
+        return
+    baseline, estimated = None, False
+    if duration and "medium" in stats:
+        baseline = stats["medium"] * duration
+    elif mode in PRESET_SPEED and elapsed:
+        baseline, estimated = elapsed / PRESET_SPEED[mode], True  # tebakan rasio preset
+    if baseline is None:
+        print(f"⏱️ Mode {mode}: {elapsed:.1f}s (belum ada data pembanding preset medium)")
+        return
+    saved = max(0.0, baseline - elapsed)
+    if not estimated:
+        print(f"⏱️ Mode {mode}: {elapsed:.1f}s, hemat ±{saved:.1f}s dibanding konversi medium")
+    else:
+        print(f"⏱️ Mode {mode}: {elapsed:.1f}s, perkiraan hemat ±{saved:.1f}s dibanding medium "
+              f"(estimasi dari rasio preset; belum ada konversi medium yang terukur)")
+
 
 # Fungsi untuk mengonversi video
-def convert_video(RAW_VIDEO_FILE):
-    SAFE_VIDEO = os.path.join(INPUT, "video_safe.mp4")
+def convert_video(RAW_VIDEO_FILE, profile="medium", threads=None, cancel=None, in_dir=None,
+                  stall_timeout=STALL_TIMEOUT):
+    SAFE_VIDEO = os.path.join(in_dir or INPUT, "video_safe.mp4")
     if not os.path.exists(RAW_VIDEO_FILE):
         print(f"⚠️ Tidak ada {RAW_VIDEO_FILE} untuk dikonversi.")
         return False
-    
-    if os.path.exists(SAFE_VIDEO):
-        print(f"ℹ️ {SAFE_VIDEO} sudah ada, skip konversi.")
-        return True
-        
-    print(f"🎞️ Mengonversi {RAW_VIDEO_FILE} ke format aman (H.264 + AAC)...")
-    cmd = [
-        "ffmpeg", "-y", "-i", RAW_VIDEO_FILE,
-        "-vf", "scale=1280:-2,fps=30,format=yuv420p",
-        "-c:v", "libx264", "-preset", "medium", "-crf", "23",
-        "-c:a", "aac", "-b:a", "128k",
-        "-movflags", "+faststart",
-        SAFE_VIDEO
-    ]
+
+    # Probe dulu: sumber yang sudah aman cukup di-remux
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        print(f"✅ Video dikonversi aman: {SAFE_VIDEO}")
-        return True
+        info = probe(RAW_VIDEO_FILE)
     except Exception as e:
-        print(f"❌ Gagal konversi video dengan FFmpeg: {e}")
-        return False
+        print(f"⚠️ ffprobe gagal ({e}), pakai konversi penuh.")
+        info = None
+    args, mode = _convert_plan(info, profile, threads)
+    duration = info["duration"] if info else None
+
+    try:
+        key = _cache_key(RAW_VIDEO_FILE, args)
+        entry = os.path.join(CACHE, key + ".mp4")
+    except Exception as e:
+        print(f"⚠️ Cache konversi tidak bisa dipakai: {e}")
+        key = entry = None
+
+    # job batch dengan video + profil sama menunggu di sini lalu dapat cache hit
+    with _cache_lock(key, cancel):
+        try:
+            if entry and os.path.exists(entry):
+                os.utime(entry)  # tandai baru dipakai (LRU)
+                with metrics.stage("convert", mode="cache"):
+                    _place_cached(entry, SAFE_VIDEO)
+                print(f"ℹ️ Hasil konversi ditemukan di cache, skip konversi: {SAFE_VIDEO}")
+                _report_time_saved("cache", 0.0, duration)
+                return True
+        except Exception as e:
+            print(f"⚠️ Cache konversi tidak bisa dipakai: {e}")
+            entry = None
+
+        if mode == "remux":
+            print(f"⚡ {RAW_VIDEO_FILE} sudah H.264 + AAC 1280px/30fps, cukup remux (+faststart)...")
+        elif mode == "audio-only":
+            print(f"🎞️ Video di-copy tanpa encode, hanya encode ulang audio {RAW_VIDEO_FILE}...")
+        else:
+            print(f"🎞️ Mengonversi {RAW_VIDEO_FILE} ke format aman (H.264 + AAC, preset {mode})...")
+        target = SAFE_VIDEO
+        if entry:
+            try:
+                # nama unik: konversi lain boleh menulis ke folder cache yang sama
+                fd, target = tempfile.mkstemp(dir=CACHE, suffix=".part.mp4")
+                os.close(fd)
+            except OSError as e:
+                print(f"⚠️ Cache konversi tidak bisa dipakai: {e}")
+                entry = None
+        cmd = ["ffmpeg", "-y", "-i", RAW_VIDEO_FILE] + args + [target]
+        try:
+            started = time.perf_counter()
+            with metrics.stage("convert", mode=mode) as m:
+                m.bytes_read = os.path.getsize(RAW_VIDEO_FILE)
+                stats = run_ffmpeg(cmd, duration, cancel, stall_timeout, label="konversi video")
+                m.bytes_written = os.path.getsize(target)
+                m.fields.update(fps=stats["fps"], speed=stats["speed"])
+            elapsed = time.perf_counter() - started
+            if entry:
+                os.replace(target, entry)
+                _place_cached(entry, SAFE_VIDEO)
+                _cache_evict(CONVERT_CACHE_MAX_BYTES, keep=entry)
+            print(f"✅ Video dikonversi aman: {SAFE_VIDEO}")
+            _report_time_saved(mode, elapsed, duration)
+            return True
+        except Exception as e:
+            if entry and os.path.exists(target):
+                os.remove(target)
+            print(f"❌ Gagal konversi video dengan FFmpeg: {e}")
+            return False
+
+# --- Stage pipeline + manifest (lewati stage yang inputnya tidak berubah) ---
+def _segment_files(out_dir):
+    return sorted(f for f in glob.glob(os.path.join(out_dir, "seg_*.*"))
+                  if f.lower().endswith(AUDIO_EXTS))
+
+def run_slice_stage(manifest, audio_file, args, cancel=None, out_dir=None):
+    out_dir = out_dir or OUTPUT
+    inputs = {
+        "audio": file_digest(audio_file), "fmt": args.fmt, "cut_mode": args.cut_mode,
+        "chunk_target_ms": CHUNK_TARGET_MS, "search_back_ms": SILENCE_SEARCH_BACK_MS,
+        "min_silence_len": MIN_SILENCE_LEN, "silence_thresh": SILENCE_THRESH,
+    }
+    if manifest.outputs("slice") and manifest.is_fresh("slice", inputs):
+        total = len(manifest.outputs("slice"))
+        print(f"⏭️ Audio & parameter tidak berubah, pakai {total} potongan dari run sebelumnya.")
+        return total
+    manifest.invalidate("slice")
+    for f in _segment_files(out_dir):
+        os.remove(f)  # sisa potongan dari audio lain
+    # hasil lipsync lama milik audio sebelumnya tidak boleh ikut digabung;
+    # final_combined yang sudah jadi tetap disimpan
+    for f in glob.glob(os.path.join(out_dir, "result_seg_*.mp4")):
+        os.remove(f)
+    manifest.invalidate("merge", remove_outputs=False)
+    # path persis dari slice_audio: --format copy bisa memakai ekstensi di luar AUDIO_EXTS
+    segments = slice_audio(audio_file, args.fmt, args.workers, args.cut_mode, cancel, out_dir)
+    if segments:
+        manifest.record("slice", inputs, segments)
+    return len(segments)
+
+def run_convert_stage(manifest, video_file, args, cancel=None, in_dir=None):
+    in_dir = in_dir or INPUT
+    safe_video = os.path.join(in_dir, "video_safe.mp4")
+    inputs = {"video": file_digest(video_file), "profile": args.profile}
+    if manifest.is_fresh("convert", inputs):
+        print(f"⏭️ Video tidak berubah, pakai {safe_video} dari run sebelumnya.")
+        return True
+    manifest.invalidate("convert")
+    ok = convert_video(video_file, args.profile, args.threads, cancel, in_dir, args.stall_timeout)
+    if ok:
+        manifest.record("convert", inputs, [safe_video])
+    return ok
+
+def run_media_prep(manifest, audio_file, video_file, args, out_dir=None, in_dir=None):
+    """Potong audio dan konversi video bersamaan (keduanya independen).
+
+    Masing-masing stage melaporkan statusnya sendiri; jika salah satu gagal,
+    stage lain langsung dihentikan (fail fast). Mengembalikan
+    (total_segments, video_ok).
+    """
+    cancel = threading.Event()
+    stages = {
+        "audio": lambda: run_slice_stage(manifest, audio_file, args, cancel, out_dir),
+        "video": lambda: run_convert_stage(manifest, video_file, args, cancel, in_dir),
+    }
+
+    def timed(fn):
+        started = time.perf_counter()
+        return fn(), time.perf_counter() - started
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+        futures = {pool.submit(timed, fn): name for name, fn in stages.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                result, elapsed = None, None
+                print(f"❌ Stage {name} error: {e}")
+            results[name] = result
+            if result:
+                print(f"✅ Stage {name} selesai dalam {elapsed:.1f}s")
+            elif cancel.is_set():
+                print(f"⏹️ Stage {name} dihentikan karena stage lain gagal.")
+            else:
+                print(f"❌ Stage {name} gagal, menghentikan stage lain...")
+                cancel.set()
+    return results.get("audio") or 0, bool(results.get("video"))
+
+def build_parser(add_help=True):
+    """Opsi stage media-prep (dipakai juga oleh batch.py)."""
+    parser = argparse.ArgumentParser(description="Potong audio & konversi video untuk sync.so",
+                                     add_help=add_help)
+    parser.add_argument("--format", dest="fmt", choices=sorted(SEGMENT_FORMATS), default="mp3",
+                        help="format potongan audio (default: mp3; copy = tanpa encode ulang)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="jumlah proses encode paralel (1 = satu proses ffmpeg untuk semua potongan)")
+    parser.add_argument("--cut-mode", choices=CUT_MODES, default="optimal",
+                        help="perencana titik potong (greedy = perilaku lama)")
+    parser.add_argument("--profile", choices=list(CONVERT_PROFILES), default="medium",
+                        help="profil kecepatan konversi video (default: medium)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="jumlah thread ffmpeg untuk konversi (default: otomatis)")
+    parser.add_argument("--stall-timeout", type=float, default=STALL_TIMEOUT,
+                        help=f"hentikan ffmpeg jika tidak ada progres selama N detik, 0 = nonaktif "
+                             f"(default: {STALL_TIMEOUT})")
+    parser.add_argument("--metrics", default=None,
+                        help="file JSON lines untuk timing per stage (default: output/metrics.jsonl)")
+    return parser
+
+def parse_args(argv=None):
+    parser = build_parser()
+    parser.add_argument("--audio", help="file audio (tanpa dialog pilih file)")
+    parser.add_argument("--video", help="file video (tanpa dialog pilih file)")
+    parser.add_argument("--reset", action="store_true",
+                        help="hapus isi input/, output/, profiles/ dan mulai dari nol")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
     print("=== START main.py ===")
 
-    # Reset folder input, output, dan profiles
-    reset_folders()
+    # Reset folder input, output, dan profiles (hanya jika diminta)
+    if args.reset:
+        reset_folders()
+    manifest = Manifest(MANIFEST, BASE)
+    # timing per stage; env ikut diwariskan ke signup/generate_sync_final
+    metrics_path = os.path.abspath(args.metrics or os.path.join(OUTPUT, "metrics.jsonl"))
+    metrics.configure(metrics_path)
+    os.environ[metrics.ENV_VAR] = metrics_path
 
-    # Memilih file audio dan video dari pengguna
-    AUDIO_FILE = pilih_file_audio()
-    RAW_VIDEO_FILE = pilih_file_video()
+    # Memilih file audio dan video dari pengguna (dialog hanya jika tidak diberikan)
+    AUDIO_FILE = args.audio or pilih_file_audio()
+    RAW_VIDEO_FILE = args.video or pilih_file_video()
 
     if not AUDIO_FILE or not RAW_VIDEO_FILE:
         print("❌ Proses dihentikan karena file audio atau video tidak dipilih.")
         return
 
-    # 1. Potong audio
-    total_segments = slice_audio(AUDIO_FILE)
+    # 1 & 2. Potong audio + konversi video (berjalan bersamaan)
+    total_segments, video_ok = run_media_prep(manifest, AUDIO_FILE, RAW_VIDEO_FILE, args)
+    table = metrics.summary_table()
+    if table:
+        print("\n⏱️ Timing per stage:\n" + table)
     
     if total_segments == 0:
         print("❌ Proses dihentikan karena audio gagal dipotong.")
         return
         
-    # 2. Konversi Video
-    if not convert_video(RAW_VIDEO_FILE):
+    if not video_ok:
         print("❌ Proses dihentikan karena video gagal dikonversi.")
         return
 
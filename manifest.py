@@ -0,0 +1,82 @@
+# ============================================================
+# manifest.py — catatan stage pipeline (input + output) agar
+# run ulang bisa melewati stage yang inputnya tidak berubah
+# ============================================================
+
+import hashlib
+import json
+import os
+import threading
+
+_digest_memo = {}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 isi file, dibaca per chunk (di-memo per path/ukuran/mtime)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key in _digest_memo:
+        return _digest_memo[memo_key]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    _digest_memo[memo_key] = h.hexdigest()
+    return _digest_memo[memo_key]
+
+
+class Manifest:
+    """File JSON berisi input (hash, parameter) dan output tiap stage.
+
+    Path output disimpan relatif terhadap `root` supaya folder proyek
+    bisa dipindah tanpa membuat manifest basi.
+    """
+
+    def __init__(self, path, root):
+        self.path = path
+        self.root = root
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+        self.data.setdefault("stages", {})
+        self._lock = threading.Lock()  # stage bisa mencatat dari thread berbeda
+
+    def _abs(self, rel):
+        return os.path.join(self.root, rel)
+
+    def outputs(self, stage):
+        entry = self.data["stages"].get(stage)
+        return [self._abs(p) for p in entry["outputs"]] if entry else []
+
+    def is_fresh(self, stage, inputs):
+        """True jika input stage sama dengan run terakhir dan semua output masih ada."""
+        entry = self.data["stages"].get(stage)
+        if not entry or entry.get("inputs") != inputs:
+            return False
+        return all(os.path.exists(p) for p in self.outputs(stage))
+
+    def record(self, stage, inputs, outputs):
+        with self._lock:
+            self.data["stages"][stage] = {
+                "inputs": inputs,
+                "outputs": [os.path.relpath(p, self.root) for p in outputs],
+            }
+            self.save()
+
+    def invalidate(self, stage, remove_outputs=True):
+        """Hapus catatan stage (output lama ikut dihapus dari disk, kecuali remove_outputs=False)."""
+        for p in self.outputs(stage) if remove_outputs else []:
+            if os.path.isfile(p):
+                os.remove(p)
+        with self._lock:
+            if self.data["stages"].pop(stage, None) is not None:
+                self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,151 @@
+# ============================================================
+# metrics.py — timing & resource per stage pipeline
+# (JSON lines + tabel ringkasan; tidak bergantung pada rich)
+#
+#   with metrics.stage("convert", mode="remux") as m:
+#       ...
+#       m.bytes_written = os.path.getsize(out)
+#
+# Peak RSS adalah high-water mark proses (kumulatif), bukan per stage.
+# Overhead per stage hanya beberapa syscall (perf_counter, os.times,
+# getrusage), jadi aman selalu aktif di produksi. Set env
+# LYPSTOOL_METRICS=path.jsonl untuk menulis setiap record ke file.
+# ============================================================
+
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory tidak tersedia
+    resource = None
+
+ENV_VAR = "LYPSTOOL_METRICS"
+
+_records = []
+_lock = threading.Lock()
+_sink = os.environ.get(ENV_VAR) or None
+
+
+def configure(path):
+    """Tulis record berikutnya sebagai JSON lines ke `path` (None = hanya memori)."""
+    global _sink
+    _sink = path
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+
+def _peak_rss_mb(who):
+    if resource is None:
+        return None
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def cpu_time():
+    """CPU proses ini + proses anak yang sudah selesai (detik)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def rss_fields():
+    """Field peak RSS (kumulatif proses) untuk ditempel ke record."""
+    if resource is None:
+        return {}
+    return {"process_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+            "children_process_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN)}
+
+
+def record(name, wall_s, cpu_s=None, **fields):
+    """Simpan satu record yang sudah diukur sendiri oleh pemanggil."""
+    rec = {"stage": name, "ts": round(time.time(), 3), "wall_s": round(wall_s, 4)}
+    if cpu_s is not None:
+        rec["cpu_s"] = round(cpu_s, 4)
+    rec.update({k: v for k, v in fields.items() if v is not None})
+    with _lock:
+        _records.append(rec)
+        if _sink:
+            with open(_sink, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    return rec
+
+
+class _Stage:
+    def __init__(self, fields):
+        self.fields = fields
+        self.bytes_read = None
+        self.bytes_written = None
+
+
+@contextmanager
+def stage(name, **fields):
+    """Ukur wall/CPU time dan byte I/O (diisi pemanggil) satu stage.
+
+    CPU = proses ini + proses anak yang sudah selesai (ffmpeg). Jika
+    beberapa stage berjalan bersamaan, CPU proses ikut terbagi di
+    antara record-nya (angka bersifat perkiraan).
+
+    process_peak_rss_mb / children_process_peak_rss_mb adalah high-water
+    mark ru_maxrss sepanjang umur proses (bukan puncak stage ini saja):
+    nilainya hanya naik dari record ke record. Untuk peak per stage,
+    jalankan stage di proses terpisah (lihat bench.py).
+    """
+    st = _Stage(dict(fields))
+    t0, c0 = time.perf_counter(), cpu_time()
+    ok = False
+    try:
+        yield st
+        ok = True
+    finally:
+        record(
+            name, time.perf_counter() - t0, cpu_time() - c0, ok=ok,
+            bytes_read=st.bytes_read, bytes_written=st.bytes_written,
+            **rss_fields(), **st.fields
+        )
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def _fmt_bytes(n):
+    if n is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024.0
+
+
+def summary_table(recs=None):
+    """Tabel teks biasa: total per nama stage (jumlah, wall, CPU, byte, peak RSS proses)."""
+    recs = records() if recs is None else recs
+    if not recs:
+        return ""
+    agg = {}
+    for r in recs:
+        a = agg.setdefault(r["stage"], {"n": 0, "wall": 0.0, "cpu": None, "rd": None, "wr": None, "rss": None})
+        a["n"] += 1
+        a["wall"] += r["wall_s"]
+        if r.get("cpu_s") is not None:
+            a["cpu"] = (a["cpu"] or 0.0) + r["cpu_s"]
+        for key, src in (("rd", "bytes_read"), ("wr", "bytes_written")):
+            if r.get(src) is not None:
+                a[key] = (a[key] or 0) + r[src]
+        if r.get("process_peak_rss_mb") is not None:
+            a["rss"] = max(a["rss"] or 0, r["process_peak_rss_mb"],
+                           r.get("children_process_peak_rss_mb") or 0)
+    lines = [f"{'stage':<16}{'n':>4}{'wall s':>10}{'cpu s':>10}{'read':>10}{'written':>10}{'proc peak MB':>14}"]
+    for name, a in agg.items():
+        lines.append(
+            f"{name:<16}{a['n']:>4}{a['wall']:>10.2f}"
+            f"{'-' if a['cpu'] is None else format(a['cpu'], '.2f'):>10}"
+            f"{_fmt_bytes(a['rd']):>10}{_fmt_bytes(a['wr']):>10}"
+            f"{'-' if a['rss'] is None else a['rss']:>14}"
+        )
+    return "\n".join(lines)
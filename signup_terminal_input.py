@@ -1,15 +1,12 @@
 import os, glob, time, re, sys, shutil, subprocess
 from datetime import datetime
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
 
-# 🎨 Tambahkan warna & emoji dengan rich
+# 🎨 Tambahkan warna & emoji dengan rich (tidak ada install otomatis saat import)
 try:
     from rich.console import Console
     from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 except ImportError:
-    os.system("pip install rich")
-    from rich.console import Console
-    from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+    sys.exit("❌ Paket rich belum terpasang. Jalankan: pip install -r requirements.txt")
 
 console = Console()
 
@@ -20,6 +17,7 @@ console = Console()
 BASE = os.path.dirname(os.path.abspath(__file__))
 OUTPUT = os.path.join(BASE, "output")
 PROFILES = os.path.join(BASE, "profiles")
+AUDIO_EXTS = (".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg")  # format seg_XX dari main.py
 MAIL_URLS = ["https://zanmail.co-id.id/", "https://mail.twibon.id/"]  # List of mail services
 SIGNUP_URL = "https://sync.so/signup"
 
@@ -118,13 +116,15 @@ def check_invalid_email(signup_page):
 # Modified signup_accounts function with alternating mail URL logic
 def signup_accounts():
     os.makedirs(PROFILES, exist_ok=True)
-    audio_files = sorted(glob.glob(os.path.join(OUTPUT, "seg_*.mp3")))
+    audio_files = sorted(f for f in glob.glob(os.path.join(OUTPUT, "seg_*.*"))
+                         if f.lower().endswith(AUDIO_EXTS))
     if not audio_files:
         log("Tidak ada file audio di output/.", "yellow", "⚠️")
         return False
 
     console.rule("[bold cyan]🌍 MEMBUAT AKUN SYNC.SO OTOMATIS[/bold cyan]")
 
+    from playwright.sync_api import sync_playwright  # dimuat hanya jika ada akun yang perlu dibuat
     try:
         with sync_playwright() as pw:
             for i, _ in enumerate(audio_files, start=1):